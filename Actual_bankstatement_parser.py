@@ -6,31 +6,55 @@ import re
 # Read the Excel file without headers
 df_raw = pd.read_excel('updated_transactions.xlsx', header=None)
 
+# Header keyword of each field, in the order that decides which field a line holds,
+# and the pattern that extracts the field from that line
+header_patterns = {
+    'Statement From': re.compile(r'Statement From\s*:\s*(.*?)\s*To\s*:\s*(.*)'),
+    'Account No': re.compile(r'Account No\s*:\s*(\d+)'),
+    'Email': re.compile(r'Email\s*:\s*(.*)'),
+    'MR': re.compile(r'(MR|MRS|MS)\s*(.*)'),
+    'MS': re.compile(r'(MR|MRS|MS)\s*(.*)'),
+    'Cust ID': re.compile(r'Cust ID\s*:\s*(\d+)'),
+}
+
+# Finds every keyword hit in one scan; the lookahead keeps overlapping hits such as 'MS' in 'MStatement'
+header_keywords = re.compile('(?=(' + '|'.join(map(re.escape, header_patterns)) + '))')
+
 # Function to extract header information
 def extract_header_info(df):
     header_info = {}
-    for index, row in df.iterrows():
-        line = ' '.join(map(str, row.dropna()))
-        if 'Statement From' in line:
-            match = re.search(r'Statement From\s*:\s*(.*?)\s*To\s*:\s*(.*)', line)
-            if match:
-                header_info['Statement Period'] = {'From': match.group(1), 'To': match.group(2)}
-        elif 'Account No' in line:
-            match = re.search(r'Account No\s*:\s*(\d+)', line)
-            if match:
-                header_info['Account Number'] = match.group(1)
-        elif 'Email' in line:
-            match = re.search(r'Email\s*:\s*(.*)', line)
-            if match:
-                header_info['Email'] = match.group(1).strip()
-        elif 'MR' in line or 'MRS' in line or 'MS' in line:
-            name_match = re.search(r'(MR|MRS|MS)\s*(.*)', line)
-            if name_match:
-                header_info['Name'] = name_match.group(2).strip()
-        elif 'Cust ID' in line:
-            match = re.search(r'Cust ID\s*:\s*(\d+)', line)
-            if match:
-                header_info['Customer ID'] = match.group(1)
+    # Join the header rows into a single text block, remembering where each row starts
+    # (itertuples yields plain tuples; None and NaN cells are dropped like row.dropna())
+    lines = [' '.join(str(v) for v in row if v is not None and v == v) for row in df.itertuples(index=False, name=None)]
+    text = '\n'.join(lines)
+    line_starts = np.cumsum([0] + [len(line) + 1 for line in lines[:-1]])
+
+    # Scan the text once, collecting every keyword hit on each row; rows are found from
+    # their offsets so a newline inside a cell does not split the row
+    line_keywords = {}
+    for hit in header_keywords.finditer(text):
+        row = int(np.searchsorted(line_starts, hit.start(), side='right')) - 1
+        line_keywords.setdefault(row, set()).add(hit.group(1))
+
+    for row, keywords in line_keywords.items():
+        line_start = int(line_starts[row])
+        line_end = line_start + len(lines[row])
+
+        # The highest-precedence keyword on the line decides which field it holds
+        keyword = next(k for k in header_patterns if k in keywords)
+        match = header_patterns[keyword].search(text, line_start, line_end)
+        if not match:
+            continue
+        if keyword == 'Statement From':
+            header_info['Statement Period'] = {'From': match.group(1), 'To': match.group(2)}
+        elif keyword == 'Account No':
+            header_info['Account Number'] = match.group(1)
+        elif keyword == 'Email':
+            header_info['Email'] = match.group(1).strip()
+        elif keyword == 'Cust ID':
+            header_info['Customer ID'] = match.group(1)
+        else:
+            header_info['Name'] = match.group(2).strip()
     return header_info
 
 # Extract header information
@@ -43,13 +67,19 @@ for key, value in header_info.items():
 def find_transaction_data_indices(df):
     transaction_start_idx = None
     transaction_end_idx = None
-    for i in range(len(df)):
-        row_values = df.iloc[i].astype(str).str.lower()
-        if 'date' in row_values.values and 'narration' in row_values.values:
-            transaction_start_idx = i + 1
-        elif 'statement summary' in ' '.join(row_values):
-            transaction_end_idx = i - 1
-            break
+    # Lowercase every cell once and locate marker rows with boolean reductions
+    cells = np.char.lower(df.to_numpy().astype(str))
+    is_header = (cells == 'date').any(axis=1) & (cells == 'narration').any(axis=1)
+    joined = pd.Series(cells.tolist()).str.join(' ')
+    is_summary = joined.str.contains('statement summary', regex=False).to_numpy()
+
+    summary_rows = np.flatnonzero(is_summary)
+    if summary_rows.size:
+        transaction_end_idx = int(summary_rows[0]) - 1
+        is_header[summary_rows[0]:] = False
+    header_rows = np.flatnonzero(is_header)
+    if header_rows.size:
+        transaction_start_idx = int(header_rows[-1]) + 1
     return transaction_start_idx, transaction_end_idx
 
 # Find indices for transaction data
@@ -65,43 +95,45 @@ df.columns = ['Date', 'Value Dt', 'Narration', 'Chq/Ref Number', 'Withdrawal Amt
 # Clean column names
 df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('.', '')
 
-# Convert 'withdrawal_amt' and 'deposit_amt' to numeric
+# Convert 'withdrawal_amt', 'deposit_amt' and 'closing_balance' to numeric
 df['withdrawal_amt'] = pd.to_numeric(df['withdrawal_amt'], errors='coerce').fillna(0)
 df['deposit_amt'] = pd.to_numeric(df['deposit_amt'], errors='coerce').fillna(0)
-
-# Function to calculate the amount as positive values
-def calculate_amount(row):
-    if row['withdrawal_amt'] > 0:
-        return row['withdrawal_amt']
-    elif row['deposit_amt'] > 0:
-        return row['deposit_amt']
-    else:
-        return 0
-
-# Function to determine transaction type
-def calculate_transaction_type(row):
-    if row['withdrawal_amt'] > 0:
-        return 'withdrawal'
-    elif row['deposit_amt'] > 0:
-        return 'deposit'
-    else:
-        return 'unknown'
-
-# Apply the functions
-df['amount'] = df.apply(calculate_amount, axis=1)
-df['transaction_type'] = df.apply(calculate_transaction_type, axis=1)
+df['closing_balance'] = pd.to_numeric(df['closing_balance'], errors='coerce')
+
+# Calculate the amount as positive values and determine transaction type
+withdrawal = df['withdrawal_amt'].to_numpy()
+deposit = df['deposit_amt'].to_numpy()
+df['amount'] = np.where(withdrawal > 0, withdrawal, np.where(deposit > 0, deposit, 0.0))
+df['transaction_type'] = np.where(withdrawal > 0, 'withdrawal', np.where(deposit > 0, 'deposit', 'unknown'))
+
+# Find the statement's date format from a sample of 'date' so 'value_dt' can be parsed with it
+date_format = None
+date_sample = df['date'].dropna().head(50)
+for fmt in ['%d/%m/%y', '%d/%m/%Y', '%Y-%m-%d']:
+    try:
+        pd.to_datetime(date_sample, format=fmt)
+        date_format = fmt
+        break
+    except (ValueError, TypeError):
+        continue
 
 # Convert date columns to datetime
 df['date'] = pd.to_datetime(df['date'], dayfirst=True, errors='coerce')
-
-# Clean narration text
-def clean_text(text):
-    text = str(text).lower()
-    text = re.sub(r'[^a-zA-Z0-9 ]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
-
-df['narration_clean'] = df['narration'].apply(clean_text)
+df['value_dt'] = pd.to_datetime(df['value_dt'], format=date_format, dayfirst=True, errors='coerce')
+
+# Store text columns as Arrow-backed strings; dates and amounts stay NumPy-backed
+# since Arrow timestamps have no Period conversion for the monthly grouping
+text_cols = ['narration', 'chq/ref_number', 'transaction_type']
+df[text_cols] = df[text_cols].astype('string[pyarrow]')
+
+# Clean narration text using Arrow-backed string kernels
+df['narration_clean'] = (
+    df['narration'].fillna('')
+    .str.lower()
+    .str.replace(r'[^a-zA-Z0-9 ]', ' ', regex=True)
+    .str.replace(r'\s+', ' ', regex=True)
+    .str.strip()
+)
 
 # Define categories and keywords
 categories = {
@@ -115,88 +147,107 @@ categories = {
     'others': []
 }
 
-# Function to categorize transactions
-def categorize_transaction(narration):
-    for category, keywords in categories.items():
-        for keyword in keywords:
-            if keyword in narration:
-                return category
-    return 'others'
+# Build one alternation pattern per category (plain strings so Arrow kernels can run them)
+category_patterns = {
+    category: '|'.join(map(re.escape, keywords))
+    for category, keywords in categories.items() if keywords
+}
 
-df['category'] = df['narration_clean'].apply(categorize_transaction)
+# Function to categorize cleaned narrations with the per-category regex patterns
+def categorize_with_regex(narrations):
+    narrations = pd.Series(narrations, dtype='string[pyarrow]')
+    result = np.full(len(narrations), 'others', dtype=object)
+    unassigned = np.ones(len(narrations), dtype=bool)
+    for category, pattern in category_patterns.items():
+        mask = narrations.str.contains(pattern, regex=True, na=False).to_numpy(dtype=bool) & unassigned
+        result[mask] = category
+        unassigned &= ~mask
+    return result
+
+# Categorize transactions; the first matching category wins
+# Narrations repeat heavily, so each distinct one is categorized once and mapped back by code
+codes, unique_narrations = pd.factorize(df['narration_clean'])
+unique_categories = categorize_with_regex(unique_narrations)
+df['category'] = pd.array(unique_categories[codes], dtype='string[pyarrow]')
 
 # Identify uncategorized transactions
 uncategorized = df[df['category'] == 'others']
 print("Uncategorized Transactions:")
 print(uncategorized['narration'].unique())
 
+# Add a 'month_year' column
+df['month_year'] = df['date'].dt.to_period('M')
+
+# Split withdrawals and deposits once and reuse them below
+withdrawals = df.loc[df['transaction_type'].values == 'withdrawal']
+deposits = df.loc[df['transaction_type'].values == 'deposit']
+
 # Calculate total expenditure and income
-total_expenditure = df[df['transaction_type'] == 'withdrawal']['amount'].sum()
-total_income = df[df['transaction_type'] == 'deposit']['amount'].sum()
+total_expenditure = withdrawals['amount'].sum()
+total_income = deposits['amount'].sum()
 
 print(f"Total Expenditure: {total_expenditure}")
 print(f"Total Income: {total_income}")
 
 # Calculate spending by category (for withdrawals only)
-category_spending = df[df['transaction_type'] == 'withdrawal'].groupby('category')['amount'].sum()
+category_spending = withdrawals.groupby('category')['amount'].sum()
 print("Spending by Category:")
 print(category_spending)
 
-# Plot spending by category
-category_spending.plot(kind='bar')
-plt.title('Spending by Category')
-plt.xlabel('Category')
-plt.ylabel('Total Amount')
-plt.show()
-
-# Add a 'month_year' column
-df['month_year'] = df['date'].dt.to_period('M')
-
 # Calculate monthly spending (for withdrawals only)
-monthly_spending = df[df['transaction_type'] == 'withdrawal'].groupby('month_year')['amount'].sum()
+monthly_spending = withdrawals.groupby('month_year')['amount'].sum()
 
-# Plot monthly spending over time
-monthly_spending.plot(kind='line', marker='o')
-plt.title('Monthly Spending Over Time')
-plt.xlabel('Month-Year')
-plt.ylabel('Total Amount')
-plt.show()
-
-# Calculate average daily spending per month
-# First, get daily spending
-daily_spending = df[df['transaction_type'] == 'withdrawal'].groupby('date')['amount'].sum().reset_index()
-
-# Add 'month_year' to daily_spending
-daily_spending['month_year'] = daily_spending['date'].dt.to_period('M')
+# Calculate average daily spending per month and overall
+# First, get daily spending, keeping the 'month_year' already computed for each withdrawal
+daily_spending = withdrawals.groupby(['month_year', 'date'])['amount'].sum().reset_index()
 
-# Calculate average daily spending per month
+# Derive both averages from the same daily totals
 avg_daily_spending_per_month = daily_spending.groupby('month_year')['amount'].mean()
+average_daily_spending = daily_spending['amount'].mean()
 
 print("Average Daily Spending per Month:")
 print(avg_daily_spending_per_month)
 
-# Plot average daily spending per month
-avg_daily_spending_per_month.plot(kind='bar')
-plt.title('Average Daily Spending per Month')
-plt.xlabel('Month-Year')
-plt.ylabel('Average Daily Spending')
-plt.show()
-
 # Get top expenses
-top_expenses = df[df['transaction_type'] == 'withdrawal'].nlargest(10, 'amount')
+top_expenses = withdrawals.nlargest(10, 'amount')
 print("Top Expenses:")
 print(top_expenses[['date', 'narration', 'amount', 'category']])
 
-# Calculate average daily spending overall
-average_daily_spending = daily_spending['amount'].mean()
+# Print average daily spending overall
 print(f"Average Daily Spending: {average_daily_spending}")
 
+# Draw all charts into one figure so the backend renders once
+fig, axs = plt.subplots(2, 2, figsize=(14, 10))
+
+# Plot spending by category
+category_spending.plot(kind='bar', ax=axs[0, 0])
+axs[0, 0].set_title('Spending by Category')
+axs[0, 0].set_xlabel('Category')
+axs[0, 0].set_ylabel('Total Amount')
+
+# Plot monthly spending over time
+monthly_spending.plot(kind='line', marker='o', ax=axs[0, 1])
+axs[0, 1].set_title('Monthly Spending Over Time')
+axs[0, 1].set_xlabel('Month-Year')
+axs[0, 1].set_ylabel('Total Amount')
+
+# Plot average daily spending per month
+avg_daily_spending_per_month.plot(kind='bar', ax=axs[1, 0])
+axs[1, 0].set_title('Average Daily Spending per Month')
+axs[1, 0].set_xlabel('Month-Year')
+axs[1, 0].set_ylabel('Average Daily Spending')
+
 # Plot distribution of transaction amounts
-df['amount'].hist(bins=20)
-plt.title('Distribution of Transaction Amounts')
-plt.xlabel('Amount')
-plt.ylabel('Frequency')
+counts, edges = np.histogram(df['amount'].to_numpy(), bins=20)
+axs[1, 1].bar(edges[:-1], counts, width=np.diff(edges), align='edge')
+axs[1, 1].grid(True)
+axs[1, 1].set_title('Distribution of Transaction Amounts')
+axs[1, 1].set_xlabel('Amount')
+axs[1, 1].set_ylabel('Frequency')
+
+fig.tight_layout()
+fig.savefig('report.png')
 plt.show()
 
-# Save the cleaned DataFrame to an Excel file
-df.to_excel('cleaned_bank_statement.xlsx', index=False)
+# Save the cleaned DataFrame to a Parquet file
+df.to_parquet('cleaned_bank_statement.parquet', compression='snappy', engine='pyarrow', index=False)
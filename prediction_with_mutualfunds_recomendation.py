@@ -3,24 +3,95 @@ import numpy as np
 import matplotlib.pyplot as plt
 from prophet import Prophet
 import os
+import hashlib
+import tempfile
 from matplotlib.ticker import FuncFormatter
 
-# Suppress SettingWithCopyWarning
-pd.options.mode.chained_assignment = None  # default='warn'
+CACHE_DIR = '.cache'
+
+def get_cache_path(file_path, date_col='date', balance_col='closing_balance'):
+    """
+    Build the Parquet cache path for a source file, keyed on its path, size and modification time
+    and on the columns load_data validated and parsed before caching.
+    """
+    stat = os.stat(file_path)
+    path_key = hashlib.md5(os.path.abspath(file_path).encode()).hexdigest()
+    version_key = hashlib.md5(f"{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()
+    columns_key = hashlib.md5(f"{date_col}:{balance_col}".encode()).hexdigest()
+    return os.path.join(CACHE_DIR, f"{path_key}-{version_key}-{columns_key}.parquet")
+
+def read_from_cache(cache_file):
+    """
+    Read a cached Parquet file, discarding it if it is missing or unreadable.
+    """
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        return pd.read_parquet(cache_file)
+    except Exception as e:
+        print(f"Warning: discarding unreadable cache file '{cache_file}': {e}")
+        os.remove(cache_file)
+        return None
+
+def save_to_cache(df, cache_file):
+    """
+    Store the preprocessed data as Parquet and remove cache files of older versions of the same source.
+    Object columns mixing strings with other values (e.g. cheque/ref numbers) are written as strings.
+    """
+    mixed_cols = [
+        col for col in df.columns[df.dtypes == object]
+        if pd.api.types.infer_dtype(df[col], skipna=True) in ('mixed', 'mixed-integer')
+    ]
+    if mixed_cols:
+        df = df.astype({col: 'string' for col in mixed_cols})
+
+    # Write to a temporary file first so an interrupted run never leaves a partial cache entry
+    tmp_file = None
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_file = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        os.close(fd)
+        df.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, cache_file)
+    except Exception as e:
+        print(f"Warning: could not cache the data as Parquet: {e}")
+        if tmp_file is not None and os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        return
+
+    path_key, version_key = os.path.basename(cache_file).split('-')[:2]
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(path_key + '-') and not name.startswith(f"{path_key}-{version_key}-"):
+            os.remove(os.path.join(CACHE_DIR, name))
 
 def load_data(file_path, date_col='date', balance_col='closing_balance'):
     """
-    Load and preprocess the Excel data.
+    Load and preprocess the Parquet or Excel data.
     """
     if not os.path.exists(file_path):
         print(f"Error: The file '{file_path}' does not exist in the current directory.")
         exit()
 
-    try:
-        df = pd.read_excel(file_path, engine='openpyxl')
-    except Exception as e:
-        print(f"Error reading the Excel file: {e}")
-        exit()
+    # Parquet output from the statement parser is read directly
+    cache_file = None
+    if file_path.endswith('.parquet'):
+        try:
+            df = pd.read_parquet(file_path)
+        except Exception as e:
+            print(f"Error reading the Parquet file: {e}")
+            exit()
+    else:
+        # Reuse the preprocessed Parquet copy if this exact file was loaded before
+        cache_file = get_cache_path(file_path, date_col=date_col, balance_col=balance_col)
+        cached = read_from_cache(cache_file)
+        if cached is not None:
+            return cached
+
+        try:
+            df = pd.read_excel(file_path, engine='openpyxl')
+        except Exception as e:
+            print(f"Error reading the Excel file: {e}")
+            exit()
 
     # Check if required columns exist
     if date_col not in df.columns or balance_col not in df.columns:
@@ -28,9 +99,12 @@ def load_data(file_path, date_col='date', balance_col='closing_balance'):
         exit()
 
     # Attempt to convert date column to datetime with multiple formats
+    # Each format is checked on a small sample first so mismatches fail fast
     date_formats = ['%Y-%m-%d', '%d/%m/%y', '%d/%m/%Y']  # Add more formats if necessary
+    sample = df[date_col].dropna().head(50)
     for fmt in date_formats:
         try:
+            pd.to_datetime(sample, format=fmt, dayfirst=True)
             df[date_col] = pd.to_datetime(df[date_col], format=fmt, dayfirst=True)
             print(f"Date conversion successful using format: {fmt}")
             break
@@ -45,6 +119,10 @@ def load_data(file_path, date_col='date', balance_col='closing_balance'):
             print(f"Error converting '{date_col}' to datetime with inferred format: {e}")
             exit()
 
+    # Cache after date conversion so mixed text/date cells are already parsed
+    if cache_file is not None:
+        save_to_cache(df, cache_file)
+
     return df
 
 def check_negative_balances(df, balance_col='closing_balance'):
@@ -58,23 +136,34 @@ def check_negative_balances(df, balance_col='closing_balance'):
     else:
         print("\nAll closing balance entries are non-negative.")
 
-def aggregate_monthly_last(df, date_col='date', balance_col='closing_balance'):
+def aggregate_monthly(df, date_col='date', balance_col='closing_balance', withdrawal_col='withdrawal_amt'):
+    """
+    Aggregate daily data to monthly last/average closing balance and total withdrawals in one pass.
+    """
+    df['year_month'] = df[date_col].dt.to_period('M').dt.to_timestamp()
+    aggregations = {
+        'last_balance': (balance_col, 'last'),
+        'mean_balance': (balance_col, 'mean'),
+    }
+    if withdrawal_col in df.columns:
+        aggregations['total_withdrawal'] = (withdrawal_col, 'sum')
+    return df.groupby('year_month').agg(**aggregations).reset_index()
+
+def aggregate_monthly_last(df, date_col='date', balance_col='closing_balance', monthly_agg=None):
     """
     Aggregate daily data to get the last closing balance of each month.
     """
-    df['year_month'] = df[date_col].dt.to_period('M')
-    monthly_last = df.groupby('year_month')[balance_col].last().reset_index()
-    monthly_last['year_month'] = monthly_last['year_month'].dt.to_timestamp()
-    return monthly_last
+    if monthly_agg is None:
+        monthly_agg = aggregate_monthly(df, date_col=date_col, balance_col=balance_col)
+    return monthly_agg[['year_month', 'last_balance']].rename(columns={'last_balance': balance_col})
 
-def aggregate_monthly_average(df, date_col='date', balance_col='closing_balance'):
+def aggregate_monthly_average(df, date_col='date', balance_col='closing_balance', monthly_agg=None):
     """
     Aggregate daily data to get the average closing balance of each month.
     """
-    df['year_month'] = df[date_col].dt.to_period('M')
-    monthly_avg = df.groupby('year_month')[balance_col].mean().reset_index()
-    monthly_avg['year_month'] = monthly_avg['year_month'].dt.to_timestamp()
-    return monthly_avg
+    if monthly_agg is None:
+        monthly_agg = aggregate_monthly(df, date_col=date_col, balance_col=balance_col)
+    return monthly_agg[['year_month', 'mean_balance']].rename(columns={'mean_balance': balance_col})
 
 def prepare_prophet_df(monthly_df, balance_col='closing_balance'):
     """
@@ -118,14 +207,24 @@ def format_indian_currency(amount):
     else:
         return f"₹{amount:.2f}"
 
+def format_indian_currency_array(amounts):
+    """
+    Vectorized format_indian_currency for a Series or array of amounts.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    idx = np.searchsorted([1e3, 1e5, 1e7], amounts, side='right')
+    scaled = amounts / np.array([1, 1e3, 1e5, 1e7])[idx]
+    prefix = np.array(['₹', '', '', ''])[idx]
+    suffix = np.array(['', 'K', 'L', 'Cr'])[idx]
+    return np.char.add(np.char.add(prefix, np.char.mod('%.2f', scaled)), suffix)
+
 def plot_forecast(monthly_df, forecast, title='Closing Balance Forecast'):
     """
     Plot the historical and forecasted closing balances.
     """
     # Apply floor to ensure non-negative values
-    forecast['yhat'] = forecast['yhat'].apply(lambda x: max(x, 0))
-    forecast['yhat_lower'] = forecast['yhat_lower'].apply(lambda x: max(x, 0))
-    forecast['yhat_upper'] = forecast['yhat_upper'].apply(lambda x: max(x, 0))
+    cols = ['yhat', 'yhat_lower', 'yhat_upper']
+    forecast[cols] = forecast[cols].clip(lower=0)
 
     plt.figure(figsize=(14, 7))
     plt.plot(monthly_df['year_month'], monthly_df['closing_balance'], label='Historical Closing Balance', color='blue')
@@ -146,29 +245,29 @@ def plot_forecast(monthly_df, forecast, title='Closing Balance Forecast'):
 
     plt.show()
 
+def build_forecast_table(forecast, periods=36, floor=False):
+    """
+    Build the Date and forecast value columns for the last 'periods' rows in one pass.
+    """
+    forecast_future = forecast.tail(periods)
+    values = forecast_future[['yhat', 'yhat_lower', 'yhat_upper']].to_numpy(dtype=float)
+    if floor:
+        # Apply floor to ensure non-negative values
+        values = np.maximum(values, 0)
+
+    table = pd.DataFrame(values, columns=['Predicted_Closing_Balance', 'Lower_Confidence_Interval', 'Upper_Confidence_Interval'])
+    table.insert(0, 'Date', forecast_future['ds'].dt.strftime('%Y-%m').to_numpy())
+    return table
+
 def display_forecast(forecast, periods=36):
     """
     Display the forecasted closing balances in a readable format.
     """
-    forecast_future = forecast.tail(periods)
-    # Apply floor to ensure non-negative values
-    forecast_future['yhat'] = forecast_future['yhat'].apply(lambda x: max(x, 0))
-    forecast_future['yhat_lower'] = forecast_future['yhat_lower'].apply(lambda x: max(x, 0))
-    forecast_future['yhat_upper'] = forecast_future['yhat_upper'].apply(lambda x: max(x, 0))
-
-    display_df = forecast_future[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
-    display_df = display_df.rename(columns={
-        'ds': 'Date',
-        'yhat': 'Predicted_Closing_Balance',
-        'yhat_lower': 'Lower_Confidence_Interval',
-        'yhat_upper': 'Upper_Confidence_Interval'
-    })
-    display_df['Date'] = display_df['Date'].dt.strftime('%Y-%m')
+    display_df = build_forecast_table(forecast, periods=periods, floor=True)
 
     # Apply formatting for display only
-    display_df['Predicted_Closing_Balance'] = display_df['Predicted_Closing_Balance'].apply(format_indian_currency)
-    display_df['Lower_Confidence_Interval'] = display_df['Lower_Confidence_Interval'].apply(format_indian_currency)
-    display_df['Upper_Confidence_Interval'] = display_df['Upper_Confidence_Interval'].apply(format_indian_currency)
+    for col in ['Predicted_Closing_Balance', 'Lower_Confidence_Interval', 'Upper_Confidence_Interval']:
+        display_df[col] = format_indian_currency_array(display_df[col])
 
     print("\nPredicted Closing Balances for the Next 3 Years (Monthly):")
     print(display_df.to_string(index=False))
@@ -177,15 +276,7 @@ def save_forecast_to_excel(forecast, periods=36, output_file='forecast_closing_b
     """
     Save the forecasted closing balances to an Excel file.
     """
-    forecast_future = forecast.tail(periods)
-    save_df = forecast_future[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
-    save_df = save_df.rename(columns={
-        'ds': 'Date',
-        'yhat': 'Predicted_Closing_Balance',
-        'yhat_lower': 'Lower_Confidence_Interval',
-        'yhat_upper': 'Upper_Confidence_Interval'
-    })
-    save_df['Date'] = save_df['Date'].dt.strftime('%Y-%m')
+    save_df = build_forecast_table(forecast, periods=periods)
 
     # Save to Excel without formatting
     try:
@@ -216,13 +307,13 @@ def remove_outliers(monthly_df, balance_col='closing_balance', lower_quantile=0.
     filtered_df = monthly_df[(monthly_df[balance_col] >= lower) & (monthly_df[balance_col] <= upper)]
     return filtered_df
 
-def calculate_average_monthly_expense(df, date_col='date', withdrawal_col='withdrawal_amt'):
+def calculate_average_monthly_expense(df, date_col='date', withdrawal_col='withdrawal_amt', monthly_agg=None):
     """
     Calculate the average monthly expense based on withdrawal amounts.
     """
-    df['year_month'] = df[date_col].dt.to_period('M')
-    monthly_expense = df.groupby('year_month')[withdrawal_col].sum().reset_index()
-    average_expense = monthly_expense['withdrawal_amt'].mean()
+    if monthly_agg is None:
+        monthly_agg = aggregate_monthly(df, date_col=date_col, withdrawal_col=withdrawal_col)
+    average_expense = monthly_agg['total_withdrawal'].mean()
     return average_expense
 
 def determine_investable_amount(current_balance, average_expense):
@@ -301,45 +392,46 @@ def load_mutual_funds(file_path):
         print(f"\nError reading the mutual funds Excel file: {e}")
         return None
 
+# Hardcoded mutual fund data for each risk category
+FUNDS_DATA = {
+    'High': [
+        {'Fund Name': 'Fund A (High Risk Category)', '1-Year Return': 12.3, '3-Year Return (Annualized)': 8.5, '5-Year Return (Annualized)': 10.7, 'Max (Since Inception)': 15.2},
+        {'Fund Name': 'Fund B (High Risk Category)', '1-Year Return': 15.6, '3-Year Return (Annualized)': 10.3, '5-Year Return (Annualized)': 12.8, 'Max (Since Inception)': 17.5},
+        {'Fund Name': 'Fund C (High Risk Category)', '1-Year Return': 18.2, '3-Year Return (Annualized)': 12.1, '5-Year Return (Annualized)': 14.5, 'Max (Since Inception)': 19.3},
+        {'Fund Name': 'Fund D (High Risk Category)', '1-Year Return': 20.1, '3-Year Return (Annualized)': 15.0, '5-Year Return (Annualized)': 16.2, 'Max (Since Inception)': 21.4},
+        {'Fund Name': 'Fund E (High Risk Category)', '1-Year Return': 22.0, '3-Year Return (Annualized)': 17.2, '5-Year Return (Annualized)': 18.3, 'Max (Since Inception)': 23.6},
+    ],
+    'Medium': [
+        {'Fund Name': 'Fund A (Medium Risk Category)', '1-Year Return': 8.5, '3-Year Return (Annualized)': 6.3, '5-Year Return (Annualized)': 7.2, 'Max (Since Inception)': 10.0},
+        {'Fund Name': 'Fund B (Medium Risk Category)', '1-Year Return': 10.2, '3-Year Return (Annualized)': 8.0, '5-Year Return (Annualized)': 9.0, 'Max (Since Inception)': 12.3},
+        {'Fund Name': 'Fund C (Medium Risk Category)', '1-Year Return': 12.1, '3-Year Return (Annualized)': 9.5, '5-Year Return (Annualized)': 10.3, 'Max (Since Inception)': 14.2},
+        {'Fund Name': 'Fund D (Medium Risk Category)', '1-Year Return': 14.0, '3-Year Return (Annualized)': 11.2, '5-Year Return (Annualized)': 12.4, 'Max (Since Inception)': 16.0},
+        {'Fund Name': 'Fund E (Medium Risk Category)', '1-Year Return': 15.8, '3-Year Return (Annualized)': 13.0, '5-Year Return (Annualized)': 14.5, 'Max (Since Inception)': 18.0},
+    ],
+    'Low': [
+        {'Fund Name': 'Fund A (Low Risk Category)', '1-Year Return': 5.3, '3-Year Return (Annualized)': 4.0, '5-Year Return (Annualized)': 5.2, 'Max (Since Inception)': 6.5},
+        {'Fund Name': 'Fund B (Low Risk Category)', '1-Year Return': 6.1, '3-Year Return (Annualized)': 5.3, '5-Year Return (Annualized)': 6.1, 'Max (Since Inception)': 7.5},
+        {'Fund Name': 'Fund C (Low Risk Category)', '1-Year Return': 7.0, '3-Year Return (Annualized)': 6.2, '5-Year Return (Annualized)': 7.0, 'Max (Since Inception)': 8.3},
+        {'Fund Name': 'Fund D (Low Risk Category)', '1-Year Return': 7.8, '3-Year Return (Annualized)': 7.0, '5-Year Return (Annualized)': 7.8, 'Max (Since Inception)': 9.5},
+        {'Fund Name': 'Fund E (Low Risk Category)', '1-Year Return': 8.5, '3-Year Return (Annualized)': 7.8, '5-Year Return (Annualized)': 8.6, 'Max (Since Inception)': 10.5},
+    ]
+}
+
+# Built once at import so suggest_mutual_fund does not rebuild them on every call
+FUNDS_DF = {category: pd.DataFrame(funds) for category, funds in FUNDS_DATA.items()}
+
 def suggest_mutual_fund(risk_category):
     """
     Suggest mutual funds based on the risk category.
     """
-    # Hardcoded data for each risk category
-    funds_data = {
-        'High': [
-            {'Fund Name': 'Fund A (High Risk Category)', '1-Year Return': 12.3, '3-Year Return (Annualized)': 8.5, '5-Year Return (Annualized)': 10.7, 'Max (Since Inception)': 15.2},
-            {'Fund Name': 'Fund B (High Risk Category)', '1-Year Return': 15.6, '3-Year Return (Annualized)': 10.3, '5-Year Return (Annualized)': 12.8, 'Max (Since Inception)': 17.5},
-            {'Fund Name': 'Fund C (High Risk Category)', '1-Year Return': 18.2, '3-Year Return (Annualized)': 12.1, '5-Year Return (Annualized)': 14.5, 'Max (Since Inception)': 19.3},
-            {'Fund Name': 'Fund D (High Risk Category)', '1-Year Return': 20.1, '3-Year Return (Annualized)': 15.0, '5-Year Return (Annualized)': 16.2, 'Max (Since Inception)': 21.4},
-            {'Fund Name': 'Fund E (High Risk Category)', '1-Year Return': 22.0, '3-Year Return (Annualized)': 17.2, '5-Year Return (Annualized)': 18.3, 'Max (Since Inception)': 23.6},
-        ],
-        'Medium': [
-            {'Fund Name': 'Fund A (Medium Risk Category)', '1-Year Return': 8.5, '3-Year Return (Annualized)': 6.3, '5-Year Return (Annualized)': 7.2, 'Max (Since Inception)': 10.0},
-            {'Fund Name': 'Fund B (Medium Risk Category)', '1-Year Return': 10.2, '3-Year Return (Annualized)': 8.0, '5-Year Return (Annualized)': 9.0, 'Max (Since Inception)': 12.3},
-            {'Fund Name': 'Fund C (Medium Risk Category)', '1-Year Return': 12.1, '3-Year Return (Annualized)': 9.5, '5-Year Return (Annualized)': 10.3, 'Max (Since Inception)': 14.2},
-            {'Fund Name': 'Fund D (Medium Risk Category)', '1-Year Return': 14.0, '3-Year Return (Annualized)': 11.2, '5-Year Return (Annualized)': 12.4, 'Max (Since Inception)': 16.0},
-            {'Fund Name': 'Fund E (Medium Risk Category)', '1-Year Return': 15.8, '3-Year Return (Annualized)': 13.0, '5-Year Return (Annualized)': 14.5, 'Max (Since Inception)': 18.0},
-        ],
-        'Low': [
-            {'Fund Name': 'Fund A (Low Risk Category)', '1-Year Return': 5.3, '3-Year Return (Annualized)': 4.0, '5-Year Return (Annualized)': 5.2, 'Max (Since Inception)': 6.5},
-            {'Fund Name': 'Fund B (Low Risk Category)', '1-Year Return': 6.1, '3-Year Return (Annualized)': 5.3, '5-Year Return (Annualized)': 6.1, 'Max (Since Inception)': 7.5},
-            {'Fund Name': 'Fund C (Low Risk Category)', '1-Year Return': 7.0, '3-Year Return (Annualized)': 6.2, '5-Year Return (Annualized)': 7.0, 'Max (Since Inception)': 8.3},
-            {'Fund Name': 'Fund D (Low Risk Category)', '1-Year Return': 7.8, '3-Year Return (Annualized)': 7.0, '5-Year Return (Annualized)': 7.8, 'Max (Since Inception)': 9.5},
-            {'Fund Name': 'Fund E (Low Risk Category)', '1-Year Return': 8.5, '3-Year Return (Annualized)': 7.8, '5-Year Return (Annualized)': 8.6, 'Max (Since Inception)': 10.5},
-        ]
-    }
-    
     # Validate the risk category input
     risk_category = risk_category.capitalize()
-    if risk_category not in funds_data:
+    if risk_category not in FUNDS_DF:
         print("Invalid risk category. Please choose from High, Medium, or Low.")
         return None
     
-    # Convert the suggested funds to a DataFrame and return
-    suggested_funds = pd.DataFrame(funds_data[risk_category])
-    return suggested_funds
-
+    # Copy so callers can modify the result without changing later suggestions
+    return FUNDS_DF[risk_category].copy()
 
 def create_investment_plan(age, investable_amount, mutual_funds):
     """
@@ -386,7 +478,8 @@ def main():
     check_negative_balances(df, balance_col=balance_column)
 
     # Step 3: Aggregate Daily Data to Monthly Data
-    monthly_df = aggregate_monthly_last(df, date_col=date_column, balance_col=balance_column)
+    monthly_agg = aggregate_monthly(df, date_col=date_column, balance_col=balance_column, withdrawal_col=withdrawal_column)
+    monthly_df = aggregate_monthly_last(df, balance_col=balance_column, monthly_agg=monthly_agg)
     # Alternatively, use aggregate_monthly_average if preferred
 
     # Step 4: Remove Outliers (Optional but Recommended)
@@ -413,7 +506,7 @@ def main():
     # Step 11: Plot the Forecast
     plot_forecast(monthly_df, forecast, title='Closing Balance Forecast for Next 3 Years')
 
-    average_expense = calculate_average_monthly_expense(df, date_col=date_column, withdrawal_col=withdrawal_column)
+    average_expense = calculate_average_monthly_expense(df, withdrawal_col=withdrawal_column, monthly_agg=monthly_agg)
     print(f"\nAverage Monthly Expense: {format_indian_currency(average_expense)}")
 
     # Step 13: Determine Current Balance from the Latest Forecast